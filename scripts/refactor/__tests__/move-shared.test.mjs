@@ -0,0 +1,262 @@
+#!/usr/bin/env node
+// Smoke tests for scripts/refactor/move-shared.mjs.
+//
+// Each case builds a throwaway git repo with a synthetic src/ tree, runs the
+// script against it via MOVE_SHARED_SRC (from an unrelated cwd), and asserts on
+// exit code, the resulting file layout, and the rewritten import specifiers.
+//
+// Run:  node scripts/refactor/__tests__/move-shared.test.mjs
+
+import { spawnSync } from 'node:child_process';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+const SCRIPT = path.resolve(__dirname, '..', 'move-shared.mjs');
+
+function git(cwd, ...args) {
+  spawnSync('git', ['-c', 'user.email=t@t', '-c', 'user.name=t', ...args], { cwd, encoding: 'utf8' });
+}
+
+/** Writes `files` (path under src/ → content) into a fresh committed repo,
+ *  runs move-shared with `args`, and returns a reader over the result. */
+function runMove(files, args) {
+  const repo = fs.mkdtempSync(path.join(os.tmpdir(), 'move-shared-'));
+  const src = path.join(repo, 'src');
+  for (const [rel, content] of Object.entries(files)) {
+    fs.mkdirSync(path.dirname(path.join(src, rel)), { recursive: true });
+    fs.writeFileSync(path.join(src, rel), content);
+  }
+  git(repo, 'init', '-q');
+  git(repo, 'add', '-A');
+  git(repo, 'commit', '-qm', 'fixture');
+  const result = spawnSync('node', [SCRIPT, ...args], {
+    cwd: os.tmpdir(),
+    env: { ...process.env, MOVE_SHARED_SRC: src },
+    encoding: 'utf8',
+  });
+  const read = (rel) => {
+    const f = path.join(src, rel);
+    return fs.existsSync(f) ? fs.readFileSync(f, 'utf8') : null;
+  };
+  const exists = (rel) => fs.existsSync(path.join(src, rel));
+  const cleanup = () => fs.rmSync(repo, { recursive: true, force: true });
+  return { code: result.status, stdout: result.stdout, stderr: result.stderr, read, exists, cleanup };
+}
+
+let passed = 0;
+let failed = 0;
+const failures = [];
+
+function expect(label, cond, detail) {
+  if (cond) {
+    passed++;
+    console.log(`  ✓ ${label}`);
+  } else {
+    failed++;
+    failures.push({ label, detail });
+    console.log(`  ✗ ${label}`);
+    if (detail) console.log(`      ${detail}`);
+  }
+}
+
+const NESTED = {
+  'feat/old/Panel.tsx': "import { Part } from './parts/Part';\nexport const Panel = 1;\n",
+  'feat/old/parts/Part.tsx': 'export const Part = 1;\n',
+  'app/App.tsx':
+    "import { Panel } from '@/feat/old/Panel';\n" +
+    "import { Part } from '@/feat/old/parts/Part';\n",
+};
+
+function checkNested(r) {
+  expect('exit code is 0', r.code === 0, `got ${r.code}: ${r.stderr}`);
+  expect('folder moved', r.read('feat/new/Panel.tsx') !== null);
+  expect('nested file moved to its own target', r.read('lib/Part.tsx') !== null);
+  expect('nested file not left in folder target', r.read('feat/new/parts/Part.tsx') === null);
+  expect('importer: folder specifier rewritten', r.read('app/App.tsx')?.includes("'@/feat/new/Panel'"));
+  expect('importer: nested specifier rewritten', r.read('app/App.tsx')?.includes("'@/lib/Part'"));
+  expect('moved file: relative import follows nested move', r.read('feat/new/Panel.tsx')?.includes("'@/lib/Part'"));
+  r.cleanup();
+}
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 1: nested file move listed AFTER its enclosing folder move
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 1: nested move after folder move');
+checkNested(runMove(NESTED, ['feat/old', 'feat/new', 'feat/old/parts/Part', 'lib/Part']));
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 2: nested file move listed BEFORE its enclosing folder move
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 2: nested move before folder move');
+checkNested(runMove(NESTED, ['feat/old/parts/Part', 'lib/Part', 'feat/old', 'feat/new']));
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 3: rename chain — pairs that aren't nested run in argv order
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 3: rename chain util → util-legacy, util-next → util');
+{
+  const r = runMove(
+    {
+      'lib/util.tsx': "export const v = 'old';\n",
+      'lib/util-next.tsx': "export const v = 'next';\n",
+      'app/App.tsx':
+        "import { v as a } from '@/lib/util';\n" +
+        "import { v as b } from '@/lib/util-next';\n",
+    },
+    ['lib/util', 'lib/util-legacy', 'lib/util-next', 'lib/util'],
+  );
+  expect('exit code is 0', r.code === 0, `got ${r.code}: ${r.stderr}`);
+  expect('old util now at util-legacy', r.read('lib/util-legacy.tsx')?.includes("'old'"));
+  expect('util-next now at util', r.read('lib/util.tsx')?.includes("'next'"));
+  expect('util-next source gone', r.read('lib/util-next.tsx') === null);
+  const app = r.read('app/App.tsx') ?? '';
+  expect('old util importer → util-legacy', app.includes("{ v as a } from '@/lib/util-legacy'"), app);
+  expect('util-next importer → util', app.includes("{ v as b } from '@/lib/util'"), app);
+  r.cleanup();
+}
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 3b: rename chain plus an unrelated nested pair — pulling the nested pair
+// forward must not let later pairs jump ahead of the folder move
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 3b: rename chain lib → lib-legacy, lib2 → lib, with nested lib/x');
+{
+  const r = runMove(
+    {
+      'lib/f.tsx': "export const v = 'lib';\n",
+      'lib/x/X.tsx': 'export const X = 1;\n',
+      'lib2/f.tsx': "export const v = 'lib2';\n",
+      'app/App.tsx':
+        "import { v as a } from '@/lib/f';\n" +
+        "import { v as b } from '@/lib2/f';\n" +
+        "import { X } from '@/lib/x/X';\n",
+    },
+    ['lib', 'lib-legacy', 'lib2', 'lib', 'lib/x', 'elsewhere/x'],
+  );
+  expect('exit code is 0', r.code === 0, `got ${r.code}: ${r.stderr}`);
+  expect('lib now at lib-legacy', r.read('lib-legacy/f.tsx')?.includes("'lib'"));
+  expect('lib2 now at lib', r.read('lib/f.tsx')?.includes("'lib2'"));
+  expect('nested pair moved to its own target', r.read('elsewhere/x/X.tsx') !== null);
+  expect('nested file not carried to lib-legacy', r.read('lib-legacy/x/X.tsx') === null);
+  const app = r.read('app/App.tsx') ?? '';
+  expect('lib importer → lib-legacy', app.includes("{ v as a } from '@/lib-legacy/f'"), app);
+  expect('lib2 importer → lib', app.includes("{ v as b } from '@/lib/f'"), app);
+  expect('nested importer → elsewhere', app.includes("{ X } from '@/elsewhere/x/X'"), app);
+  r.cleanup();
+}
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 4: destination already exists → hard failure, never a silent skip
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 4: existing destination');
+{
+  const r = runMove(
+    {
+      'lib/a.tsx': "export const v = 'a';\n",
+      'lib/b.tsx': "export const v = 'b';\n",
+      'lib/c.tsx': "export const v = 'c';\n",
+    },
+    ['lib/c', 'fresh/c', 'lib/a', 'lib/b'],
+  );
+  expect('exit code is non-zero', r.code !== 0, `got ${r.code}`);
+  expect('reports the clobbered destination', r.stderr.includes('DESTINATION EXISTS'), r.stderr);
+  expect('destination untouched', r.read('lib/b.tsx')?.includes("'b'"));
+  expect('source untouched', r.read('lib/a.tsx')?.includes("'a'"));
+  expect('earlier valid pair not moved', r.read('lib/c.tsx') !== null);
+  expect('no empty destination dir left behind', !r.exists('fresh'));
+  r.cleanup();
+}
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 4b: folder move with one clashing file → rejected before ANY git mv
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 4b: partial collision inside a folder move');
+{
+  const r = runMove(
+    {
+      'a/x.tsx': 'export const x = 1;\n',
+      'a/y.tsx': "export const y = 'a';\n",
+      'c/y.tsx': "export const y = 'c';\n",
+      'app/App.tsx': "import { x } from '@/a/x';\n",
+    },
+    ['a', 'c'],
+  );
+  expect('exit code is non-zero', r.code !== 0, `got ${r.code}`);
+  expect('reports the clashing destination', r.stderr.includes('DESTINATION EXISTS'), r.stderr);
+  expect('non-clashing file not moved', r.read('a/x.tsx') !== null && r.read('c/x.tsx') === null);
+  expect('existing destination untouched', r.read('c/y.tsx')?.includes("'c'"));
+  expect('importer untouched', r.read('app/App.tsx')?.includes("'@/a/x'"));
+  r.cleanup();
+}
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 5: non-ASCII directory inside a moved folder keeps valid UTF-8 paths
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 5: non-ASCII directory name under a moved folder');
+{
+  const r = runMove(
+    {
+      'feat/old/ünï/Z.tsx': "import { Y } from './Y';\nexport const Z = Y;\n",
+      'feat/old/ünï/Y.tsx': 'export const Y = 1;\n',
+    },
+    ['feat/old', 'feat/new'],
+  );
+  expect('exit code is 0', r.code === 0, `got ${r.code}: ${r.stderr}`);
+  const z = r.read('feat/new/ünï/Z.tsx') ?? '';
+  expect('relative import absolutized with UTF-8 path', z.includes("from '@/feat/new/ünï/Y'"), z);
+  r.cleanup();
+}
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 6: chained pairs — a later pair moves a path an earlier pair created
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 6: chained move a → b, b/x → c in one invocation');
+{
+  const r = runMove(
+    {
+      'a/x/X.tsx': 'export const X = 1;\n',
+      'a/Y.tsx': "import { X } from './x/X';\nexport const Y = X;\n",
+      'app/App.tsx':
+        "import { X } from '@/a/x/X';\n" +
+        "import { Y } from '@/a/Y';\n",
+    },
+    ['a', 'b', 'b/x', 'c'],
+  );
+  expect('exit code is 0', r.code === 0, `got ${r.code}: ${r.stderr}`);
+  expect('chained file lands at the final target', r.read('c/X.tsx') !== null);
+  expect('chained file not left at the intermediate target', r.read('b/x/X.tsx') === null);
+  expect('rest of the folder moved', r.read('b/Y.tsx') !== null);
+  const app = r.read('app/App.tsx') ?? '';
+  expect('importer: chained specifier composed', app.includes("{ X } from '@/c/X'"), app);
+  expect('importer: folder specifier rewritten', app.includes("{ Y } from '@/b/Y'"), app);
+  expect('moved file: relative import composed', r.read('b/Y.tsx')?.includes("'@/c/X'"));
+  r.cleanup();
+}
+
+// ────────────────────────────────────────────────────────────────────────
+// Case 7: missing source → NOT FOUND before any move
+// ────────────────────────────────────────────────────────────────────────
+console.log('\nCase 7: missing source');
+{
+  const r = runMove(
+    { 'a/X.tsx': 'export const X = 1;\n' },
+    ['a', 'b', 'nope', 'c'],
+  );
+  expect('exit code is non-zero', r.code !== 0, `got ${r.code}`);
+  expect('reports NOT FOUND', r.stderr.includes('NOT FOUND'), r.stderr);
+  expect('nothing moved', r.read('a/X.tsx') !== null && !r.exists('b'));
+  r.cleanup();
+}
+
+// ────────────────────────────────────────────────────────────────────────
+console.log(`\nResults: ${passed} passed, ${failed} failed`);
+if (failed > 0) {
+  console.log('\nFailures:');
+  for (const f of failures) console.log(`  - ${f.label}${f.detail ? ': ' + f.detail : ''}`);
+  process.exit(1);
+}
+process.exit(0);
@@ -8,14 +8,27 @@
  * Folder moves rewrite the whole prefix; file moves match a specifier boundary
  * (quote/slash lookahead) so e.g. `PersonaIcon` never partial-hits `PersonaIconPickerModal`.
  *
+ * Pairs apply in argv order, so a later pair may move a path an earlier pair
+ * created (`a b  b/x c` sends a/x to c). A pair nested inside an earlier folder
+ * pair's source runs before that folder move instead.
+ *
  *   node scripts/refactor/move-shared.mjs \
  *     features/shared/components/editors/draft-editor features/templates/draft-editor
+ *
+ * Runs from any cwd; set MOVE_SHARED_SRC to target a different checkout's src/
+ * (a worktree, or a scratch fixture as in __tests__/move-shared.test.mjs).
  */
 import { readdirSync, readFileSync, writeFileSync, statSync, mkdirSync, existsSync } from 'node:fs';
+import { readFile, writeFile } from 'node:fs/promises';
+import { availableParallelism } from 'node:os';
 import { join, dirname, sep, resolve, relative } from 'node:path';
+import { fileURLToPath } from 'node:url';
 import { execSync } from 'node:child_process';
 
-const SRC = 'src';
+// Absolute, from the script's location (see header for MOVE_SHARED_SRC).
+const SRC = process.env.MOVE_SHARED_SRC
+  ? resolve(process.env.MOVE_SHARED_SRC)
+  : resolve(dirname(fileURLToPath(import.meta.url)), '..', '..', 'src');
 const argv = process.argv.slice(2);
 const pairs = [];
 for (let i = 0; i < argv.length; i += 2) pairs.push([argv[i], argv[i + 1]]);
@@ -23,17 +36,42 @@ if (!pairs.length || pairs.some((p) => !p[1])) {
   console.error('usage: move-shared.mjs <oldRelToSrc> <newRelToSrc> [<old2> <new2> ...]');
   process.exit(1);
 }
+const dupes = pairs.map((p) => p[0]).filter((o, i, all) => all.indexOf(o) !== i);
+if (dupes.length) {
+  console.error(`duplicate source path(s): ${[...new Set(dupes)].join(', ')}`);
+  process.exit(1);
+}
+// Execution follows argv. The one exception: pairs whose source sits INSIDE a
+// folder pair's source (path-segment prefix) are pulled forward to run just
+// before that folder pair — otherwise the folder move would carry the nested
+// file off first. Nothing else moves, so rename chains like
+// `util util-legacy  util-next util` keep their argv sequence.
+const isNestedIn = (inner, outer) => inner.startsWith(outer + '/');
+const ordered = [];
+const emitted = new Set();
+function emit(pair) {
+  if (emitted.has(pair)) return;
+  emitted.add(pair);
+  for (const p of pairs) if (isNestedIn(p[0], pair[0])) emit(p);
+  ordered.push(pair);
+}
+pairs.forEach(emit);
 
 const escapeRe = (s) => s.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
 const posix = (p) => p.split(sep).join('/');
+// Compiled once at load; every file in src/ is tested/rewritten against these.
+// The opening quote is captured and backreferenced, so one pattern covers both
+// quoting styles and a specifier only matches when its quotes agree.
+const RELATIVE_IMPORT_RE = /((?:from|import)\s+)(['"])(\.[^'"]*)\2/g;
+const TS_FILE_RE = /\.tsx?$/;
 
 // 1) git mv each move at FILE granularity (Windows locks the directory node on a
 // dir rename, but individual file renames succeed; retry absorbs transient locks).
 function walkFiles(d) {
   const out = [];
-  for (const n of readdirSync(d)) {
-    const f = join(d, n);
-    if (statSync(f).isDirectory()) out.push(...walkFiles(f));
+  for (const e of readdirSync(d, { withFileTypes: true })) {
+    const f = join(d, e.name);
+    if (e.isDirectory()) out.push(...walkFiles(f));
     else out.push(f);
   }
   return out;
@@ -45,51 +83,116 @@ function walkFiles(d) {
 function absolutizeRelatives(absFile) {
   const dir = dirname(absFile);
   const orig = readFileSync(absFile, 'utf8');
-  const s = orig.replace(/((?:from|import)\s+['"])(\.[^'"]*)(['"])/g, (_m, pre, spec, post) => {
+  const s = orig.replace(RELATIVE_IMPORT_RE, (_m, pre, q, spec) => {
     const rel = relative(SRC, resolve(dir, spec)).split(sep).join('/');
-    return `${pre}@/${rel}${post}`;
+    return `${pre}${q}@/${rel}${q}`;
   });
   if (s !== orig) writeFileSync(absFile, s);
 }
 function gitmv(from, to) {
-  if (existsSync(to)) return; // already relocated (idempotent re-run)
   absolutizeRelatives(from);
-  mkdirSync(dirname(to), { recursive: true });
   for (let i = 0; ; i++) {
-    try { execSync(`git mv "${posix(from)}" "${posix(to)}"`, { stdio: ['ignore', 'ignore', 'pipe'] }); return; }
+    try { execSync(`git mv "${posix(from)}" "${posix(to)}"`, { cwd: dirname(SRC), stdio: ['ignore', 'ignore', 'pipe'] }); return; }
     catch (e) { if (i >= 6) { console.error(`FAILED: ${from}\n${e.stderr || e.message}`); process.exit(1); } }
   }
 }
+// Plan every file move before touching anything: a missing source aborts with
+// nothing moved, and each destination directory is created once rather than
+// mkdir'd per file. A pair's source is resolved against the destinations already
+// planned as well as the disk, so a chained pair retargets the earlier move
+// (a/x → b/x → c becomes one a/x → c). Nested pairs are ordered first, so a
+// nested move claims its file before the enclosing folder move walks past it.
+const planned = new Map();
 const moves = [];
-for (const [oldRel, newRel] of pairs) {
+for (const [oldRel, newRel] of ordered) {
   const base = join(SRC, oldRel);
-  if (existsSync(base) && statSync(base).isDirectory()) {
-    for (const f of walkFiles(base)) gitmv(f, join(SRC, newRel, f.slice(base.length + 1)));
-  } else if (existsSync(base + '.tsx')) { gitmv(base + '.tsx', join(SRC, newRel) + '.tsx'); }
-  else if (existsSync(base + '.ts')) { gitmv(base + '.ts', join(SRC, newRel) + '.ts'); }
-  else { console.error(`NOT FOUND: ${base}`); process.exit(1); }
+  const dest = join(SRC, newRel);
+  let found = false;
+  for (const [from, to] of planned) {
+    if (to.startsWith(base + sep) || to === base + '.tsx' || to === base + '.ts') {
+      planned.set(from, dest + to.slice(base.length));
+      found = true;
+    }
+  }
+  if (statSync(base, { throwIfNoEntry: false })?.isDirectory()) {
+    for (const f of walkFiles(base)) {
+      if (!planned.has(f)) planned.set(f, dest + f.slice(base.length));
+    }
+    found = true;
+  } else {
+    for (const ext of ['.tsx', '.ts']) {
+      if (!found && existsSync(base + ext) && !planned.has(base + ext)) {
+        planned.set(base + ext, dest + ext);
+        found = true;
+      }
+    }
+  }
+  if (!found) { console.error(`NOT FOUND: ${base}`); process.exit(1); }
   moves.push({ oldRel, newRel });
 }
+// Reject collisions before the first git mv, so a clash also aborts with nothing
+// moved. A destination may exist on disk only if an EARLIER planned move vacates
+// it (rename chains), and no two moves may land on the same path.
+const moveIndex = new Map([...planned.keys()].map((from, i) => [from, i]));
+const claimed = new Set();
+const clashes = [];
+[...planned].forEach(([from, to], i) => {
+  if (claimed.has(to) || (existsSync(to) && !(moveIndex.get(to) < i))) clashes.push(`${to} (from ${from})`);
+  claimed.add(to);
+});
+if (clashes.length) {
+  console.error(`DESTINATION EXISTS:\n  ${clashes.join('\n  ')}`);
+  process.exit(1);
+}
+// Only now create destination dirs: git doesn't track empty directories, so any
+// made before a validation abort would be litter `git checkout` can't clean up.
+for (const d of new Set([...planned.values()].map((to) => dirname(to)))) mkdirSync(d, { recursive: true });
+for (const [from, to] of planned) gitmv(from, to);
 
 // 2) rewrite `@/<old>` -> `@/<new>` (boundary = quote or slash) across src/.
+// Rules apply one after another in execution order, mirroring the moves: chained
+// pairs compose (`@/a/x/..` → `@/b/x/..` → `@/c/..`), and a nested pair rewrites
+// its specifiers before the enclosing folder's rule can claim them.
 const rules = moves.map(({ oldRel, newRel }) => ({
   re: new RegExp('@/' + escapeRe(oldRel) + "(?=['\"`/])", 'g'),
   to: '@/' + newRel,
 }));
+// Early-out anchor: the longest prefix shared by every moved path. A file that
+// never contains it matches no rule (a chained rule only fires on text an earlier
+// rule produced), and `includes` is a plain substring search — far cheaper than
+// running every rule over every file.
+const ANCHOR = '@/' + moves.map((m) => m.oldRel).reduce((pre, k) => {
+  let i = 0;
+  while (i < pre.length && pre[i] === k[i]) i++;
+  return pre.slice(0, i);
+});
+// Typed dirents: one readdir syscall per directory instead of a stat per entry.
 function walk(d) {
   const out = [];
-  for (const n of readdirSync(d)) {
-    const f = join(d, n);
-    if (statSync(f).isDirectory()) { if (n !== 'node_modules') out.push(...walk(f)); }
-    else if (/\.tsx?$/.test(f)) out.push(f);
+  for (const e of readdirSync(d, { withFileTypes: true })) {
+    const f = join(d, e.name);
+    if (e.isDirectory()) { if (e.name !== 'node_modules') out.push(...walk(f)); }
+    else if (TS_FILE_RE.test(f)) out.push(f);
   }
   return out;
 }
+// Unchanged files are never written — no mtime churn to wake the dev server's
+// watcher, and a re-run over an already-migrated tree is read-only.
+const sources = walk(SRC);
 let files = 0, hits = 0;
-for (const f of walk(SRC)) {
-  const orig = readFileSync(f, 'utf8');
+async function rewriteImports(f) {
+  const orig = await readFile(f, 'utf8');
+  if (!orig.includes(ANCHOR)) return;
   let s = orig;
   for (const { re, to } of rules) s = s.replace(re, () => (hits++, to));
-  if (s !== orig) { writeFileSync(f, s); files++; }
+  if (s !== orig) { await writeFile(f, s); files++; }
 }
-console.log(`moved ${moves.length} path(s); rewrote ${hits} import specifier(s) across ${files} file(s)`);
+// Files are independent, so a bounded pool of workers drains one shared iterator:
+// read/write latency (slow opens under Windows AV) overlaps instead of queueing,
+// without holding every file in src/ open at once. The git mv step above stays
+// serial — git's index lock would reject concurrent moves.
+const queue = sources.values();
+await Promise.all(Array.from({ length: availableParallelism() * 2 }, async () => {
+  for (const f of queue) await rewriteImports(f);
+}));
+console.log(`moved ${moves.length} path(s); rewrote ${hits} import specifier(s) across ${files} of ${sources.length} file(s)`);